@@ -7,8 +7,11 @@ from utils import DownloadCanceledException, format_bytes # Import exception and
 from config_manager import VIDEO_DIR, COOKIE_FILE_PATH, FFMPEG_PATH # Import paths from config_manager
 
 class DownloadManager:
-    def __init__(self, progress_hook: Callable[[Dict[str, Any]], None], cancel_event: threading.Event):
+    def __init__(self, progress_hook: Callable[[Dict[str, Any]], None], cancel_event: threading.Event,
+                 cookie_file: str = COOKIE_FILE_PATH, ffmpeg_path: str = FFMPEG_PATH):
         self.progress_hook = progress_hook
+        self.cookie_file = cookie_file
+        self.ffmpeg_path = ffmpeg_path
         self._download_canceled = cancel_event
         self.current_download_process: Optional[yt_dlp.YoutubeDL] = None
 
@@ -17,9 +20,9 @@ class DownloadManager:
         ydl_opts = {
             'quiet': True,
             'skip_download': True,
-            'cookiefile': COOKIE_FILE_PATH,
+            'cookiefile': self.cookie_file,
             'nocheckcertificate': True,
-            'ffmpeg_location': FFMPEG_PATH
+            'ffmpeg_location': self.ffmpeg_path
         }
 
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
@@ -42,9 +45,9 @@ class DownloadManager:
             'format': f'bv*[height<={resolution}][ext=mp4]+ba[ext=m4a]/b[height<={resolution}][ext=mp4]',
             'outtmpl': os.path.join(target_dir, f'{filename}.%(ext)s'),
             'progress_hooks': [self.progress_hook],
-            'cookiefile': COOKIE_FILE_PATH,
+            'cookiefile': self.cookie_file,
             'nocheckcertificate': True,
-            'ffmpeg_location': FFMPEG_PATH
+            'ffmpeg_location': self.ffmpeg_path
         }
 
         # Merge video and audio if they are downloaded separately (this is the default behavior if bv+ba is selected)
@@ -3,7 +3,6 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox
 import threading
-import re
 from typing import Dict, Any
 from PIL import Image  # Import PIL for logo handling
 import webbrowser # For opening coffee page
@@ -12,7 +11,7 @@ import subprocess # For opening folder on non-Windows
 import yt_dlp # Import yt_dlp for handling exceptions in GUI
 
 from config_manager import load_config, save_config, ensure_directories, DOWNLOAD_DIR
-from utils import check_dependencies, format_bytes, DownloadCanceledException, LOGO_PATH, ICON_PATH
+from utils import check_dependencies, format_bytes, sanitize_filename, DownloadCanceledException, LOGO_PATH, ICON_PATH
 from downloader import DownloadManager
 
 # Set the default color theme for better light mode appearance
@@ -334,7 +333,7 @@ class YouTubeDownloader(ctk.CTk):
             temp_manager = DownloadManager(progress_hook=lambda d: None, cancel_event=threading.Event())
             info = temp_manager.fetch_video_info(url)
 
-            title = re.sub(r'[<>:"/\\|?*\x00-\x1F]', '_', info['title'])
+            title = sanitize_filename(info['title'])
             filesize = info.get('filesize_approx', 0)
 
             self.after(0, lambda: self.title_label_info.configure(
@@ -412,7 +411,7 @@ class YouTubeDownloader(ctk.CTk):
 
         self.reset_selection_frame()
 
-        title = re.sub(r'[<>:"/\\|?*\x00-\x1F]', '_', info['title'])
+        title = sanitize_filename(info['title'])
         filename = f"{title}_{resolution}p"
 
         self.status_label.configure(text=f"Starting download...", text_color="yellow") # Change from "blue" to "yellow"
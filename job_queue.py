@@ -0,0 +1,194 @@
+# job_queue.py
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+# Job states
+STATUS_QUEUED = "queued"
+STATUS_LEASED = "leased"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+# Reported by stats() for leased jobs whose lease ran out (the worker is probably gone); not stored
+STATUS_EXPIRED = "expired"
+
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    resolution INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker_id TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_idx ON jobs (status, lease_expires);
+"""
+
+@dataclass
+class Job:
+    id: int
+    url: str
+    resolution: int
+    attempts: int
+
+class JobQueue:
+    """Lease-based job queue stored in a single SQLite file.
+
+    Workers on any host that can open the file claim a job with a lease,
+    renew it with heartbeats while they work, and mark it done or failed.
+    A job whose lease runs out (the worker died or lost the file) becomes
+    claimable again until it has used up max_attempts.
+
+    Lease times use the wall clock, so the hosts' clocks must be synced (NTP).
+    The default rollback journal is kept on purpose: WAL mode does not work
+    on network filesystems.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived connection (safe to use from any thread or process)"""
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction holding the database lock from the start"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def enqueue(self, url: str, resolution: int, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        """Add a download job and return its id"""
+        now = time.time()
+        with self._write_transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (url, resolution, status, max_attempts, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, resolution, STATUS_QUEUED, max_attempts, now, now),
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id: str) -> Optional[Job]:
+        """Lease the oldest available job to worker_id, or return None if there is none"""
+        now = time.time()
+        with self._write_transaction() as conn:
+            # Expired leases that have used up their attempts are not retried again
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = COALESCE(error, 'Lease expired'), worker_id = NULL, "
+                "lease_expires = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                (STATUS_FAILED, now, STATUS_LEASED, now),
+            )
+            row = conn.execute(
+                "SELECT id, url, resolution, attempts FROM jobs "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (STATUS_QUEUED, STATUS_LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?",
+                (STATUS_LEASED, worker_id, now + self.lease_seconds, now, row["id"]),
+            )
+            return Job(id=row["id"], url=row["url"], resolution=row["resolution"],
+                       attempts=row["attempts"] + 1)
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Extend the lease on a job. Returns False if worker_id no longer holds it."""
+        now = time.time()
+        with self._write_transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = ?",
+                (now + self.lease_seconds, now, job_id, worker_id, STATUS_LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str) -> bool:
+        """Mark a leased job as done. Returns False if the lease was lost meanwhile."""
+        now = time.time()
+        with self._write_transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, lease_expires = NULL, error = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = ?",
+                (STATUS_DONE, now, job_id, worker_id, STATUS_LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry: bool = True) -> bool:
+        """Release a leased job after an error.
+
+        The job goes back to the queue if retry is set and it has attempts left,
+        otherwise it is marked as failed. Returns False if the lease was lost meanwhile.
+        """
+        now = time.time()
+        with self._write_transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN ? AND attempts < max_attempts THEN ? ELSE ? END, "
+                "worker_id = NULL, lease_expires = NULL, error = ?, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = ?",
+                (int(retry), STATUS_QUEUED, STATUS_FAILED, error, now, job_id, worker_id, STATUS_LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, job_id: int, worker_id: str) -> bool:
+        """Put a leased job back in the queue without counting the attempt (used on worker shutdown)"""
+        now = time.time()
+        with self._write_transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = NULL, lease_expires = NULL, "
+                "attempts = MAX(attempts - 1, 0), updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = ?",
+                (STATUS_QUEUED, now, job_id, worker_id, STATUS_LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def pending(self) -> int:
+        """Count jobs that may still run: queued ones and leased ones (expired leases included)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS n FROM jobs WHERE status IN (?, ?)", (STATUS_QUEUED, STATUS_LEASED)
+            ).fetchone()
+            return row["n"]
+
+    def stats(self) -> Dict[str, int]:
+        """Count jobs per status, listing leased jobs whose lease ran out as expired"""
+        counts = {STATUS_QUEUED: 0, STATUS_LEASED: 0, STATUS_EXPIRED: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT CASE WHEN status = ? AND lease_expires < ? THEN ? ELSE status END AS state, "
+                "COUNT(*) AS n FROM jobs GROUP BY state",
+                (STATUS_LEASED, time.time(), STATUS_EXPIRED),
+            )
+            for row in rows:
+                counts[row["state"]] = row["n"]
+        return counts
@@ -0,0 +1,135 @@
+# test_job_queue.py
+import multiprocessing
+import time
+
+from job_queue import JobQueue, STATUS_DONE, STATUS_EXPIRED, STATUS_FAILED, STATUS_LEASED, STATUS_QUEUED
+
+SHORT_LEASE = 0.2
+
+def _claim_all(db_path, results):
+    """Claim and complete jobs until the queue is empty, reporting the claimed ids"""
+    queue = JobQueue(db_path)
+    worker_id = f"worker-{multiprocessing.current_process().pid}"
+    claimed = []
+    while True:
+        job = queue.claim(worker_id)
+        if job is None:
+            break
+        assert queue.complete(job.id, worker_id)
+        claimed.append(job.id)
+    results.put(claimed)
+
+def test_each_job_claimed_once_across_processes(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    queue = JobQueue(db_path)
+    job_ids = [queue.enqueue(f"https://example.com/{i}", 720) for i in range(200)]
+
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_claim_all, args=(db_path, results)) for _ in range(6)]
+    for process in processes:
+        process.start()
+    claimed = []
+    for _ in processes:
+        claimed.extend(results.get(timeout=60))
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    assert sorted(claimed) == job_ids
+    assert queue.stats()[STATUS_DONE] == len(job_ids)
+
+def test_expired_lease_is_requeued(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=SHORT_LEASE)
+    job_id = queue.enqueue("https://example.com/a", 720)
+
+    assert queue.claim("a").id == job_id
+    assert queue.claim("b") is None
+    time.sleep(SHORT_LEASE * 2)
+
+    job = queue.claim("b")
+    assert job.id == job_id
+    assert job.attempts == 2
+
+def test_job_failed_after_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=SHORT_LEASE)
+    expired_id = queue.enqueue("https://example.com/a", 720, max_attempts=2)
+    failing_id = queue.enqueue("https://example.com/b", 720, max_attempts=2)
+
+    # Leases that keep expiring
+    for _ in range(2):
+        assert queue.claim("a").id == expired_id
+        time.sleep(SHORT_LEASE * 2)
+    # Explicit failures
+    for _ in range(2):
+        job = queue.claim("a")
+        assert job.id == failing_id
+        assert queue.fail(job.id, "a", "boom")
+
+    assert queue.claim("a") is None
+    assert queue.stats()[STATUS_FAILED] == 2
+
+def test_fail_without_retry_is_final(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    queue.enqueue("https://example.com/a", 720)
+
+    job = queue.claim("a")
+    assert queue.fail(job.id, "a", "boom", retry=False)
+    assert queue.claim("a") is None
+    assert queue.stats()[STATUS_FAILED] == 1
+
+def test_release_does_not_count_attempt(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    queue.enqueue("https://example.com/a", 720, max_attempts=1)
+
+    job = queue.claim("a")
+    assert queue.release(job.id, "a")
+    assert queue.stats()[STATUS_QUEUED] == 1
+
+    job = queue.claim("b")
+    assert job.attempts == 1
+
+def test_lease_operations_fail_after_takeover(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=SHORT_LEASE)
+    queue.enqueue("https://example.com/a", 720)
+
+    job = queue.claim("a")
+    assert queue.heartbeat(job.id, "a")
+    time.sleep(SHORT_LEASE * 2)
+    assert queue.claim("b").id == job.id
+
+    assert not queue.heartbeat(job.id, "a")
+    assert not queue.complete(job.id, "a")
+    assert not queue.release(job.id, "a")
+    assert not queue.fail(job.id, "a", "boom")
+    assert queue.complete(job.id, "b")
+
+def test_stats_reports_expired_leases(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=SHORT_LEASE)
+    queue.enqueue("https://example.com/a", 720)
+    queue.enqueue("https://example.com/b", 720)
+
+    queue.claim("a")
+    stats = queue.stats()
+    assert (stats[STATUS_LEASED], stats[STATUS_EXPIRED], stats[STATUS_QUEUED]) == (1, 0, 1)
+
+    time.sleep(SHORT_LEASE * 2)
+    stats = queue.stats()
+    assert (stats[STATUS_LEASED], stats[STATUS_EXPIRED], stats[STATUS_QUEUED]) == (0, 1, 1)
+
+def test_pending_counts_queued_and_leased_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=SHORT_LEASE)
+    queue.enqueue("https://example.com/a", 720)
+    queue.enqueue("https://example.com/b", 720)
+    assert queue.pending() == 2
+
+    job = queue.claim("a")
+    assert queue.pending() == 2
+    queue.complete(job.id, "a")
+    assert queue.pending() == 1
+
+    job = queue.claim("a")
+    time.sleep(SHORT_LEASE * 2)
+    assert queue.pending() == 1
+    queue.claim("b")
+    queue.fail(job.id, "b", "boom", retry=False)
+    assert queue.pending() == 0
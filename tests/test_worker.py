@@ -0,0 +1,207 @@
+# test_worker.py
+import multiprocessing
+import sqlite3
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+import worker as worker_module
+from job_queue import JobQueue, STATUS_DONE, STATUS_FAILED, STATUS_QUEUED
+from utils import DownloadCanceledException
+from worker import Worker
+
+@pytest.fixture(autouse=True)
+def no_download_dirs(monkeypatch):
+    # Worker.run creates the download folders in the working directory
+    monkeypatch.setattr(worker_module, "ensure_directories", lambda: None)
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.5)
+
+def make_worker(queue, run_download, worker_id="w1"):
+    worker = Worker(queue, worker_id=worker_id, heartbeat_interval=0.05, poll_interval=0.01)
+    worker.run_download = run_download
+    return worker
+
+def job_row(queue, job_id):
+    with sqlite3.connect(queue.db_path) as conn:
+        return conn.execute("SELECT status, worker_id, attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+def test_completes_queued_jobs(queue):
+    for i in range(5):
+        queue.enqueue(f"https://example.com/{i}", 720)
+    downloaded = []
+    worker = make_worker(queue, lambda job, cancel_event: downloaded.append(job.id))
+
+    assert worker.run(exit_when_empty=True) == 5
+    assert downloaded == [1, 2, 3, 4, 5]
+    assert queue.stats()[STATUS_DONE] == 5
+
+def test_exit_when_empty_waits_for_other_workers_leases(queue):
+    dead_id = queue.enqueue("https://example.com/a", 720)
+    queue.enqueue("https://example.com/b", 720)
+    # A worker that claims a job and then dies without heartbeating
+    assert queue.claim("dead-worker").id == dead_id
+    downloaded = []
+    worker = make_worker(queue, lambda job, cancel_event: downloaded.append(job.id))
+
+    assert worker.run(exit_when_empty=True) == 2
+    assert downloaded == [2, dead_id]
+    assert job_row(queue, dead_id) == (STATUS_DONE, "w1", 2)
+
+def _run_worker_process(db_path, worker_id, slow, done_ids):
+    """Run a Worker with a stubbed download, reporting each job it completes"""
+    def run_download(job, cancel_event):
+        # The slow worker gets killed while it is still on its first job
+        time.sleep(60 if slow else 0.01)
+
+    worker = make_worker(JobQueue(db_path, lease_seconds=0.5), run_download, worker_id=worker_id)
+    process_job = worker.process_job
+
+    def recording_process_job(job):
+        completed = process_job(job)
+        if completed:
+            done_ids.put(job.id)
+        return completed
+
+    worker.process_job = recording_process_job
+    worker.run(exit_when_empty=True)
+
+def test_worker_processes_finish_every_job_once_when_one_is_killed(queue):
+    job_ids = [queue.enqueue(f"https://example.com/{i}", 720) for i in range(40)]
+    done_ids = multiprocessing.Queue()
+
+    doomed = multiprocessing.Process(target=_run_worker_process, args=(queue.db_path, "doomed", True, done_ids))
+    doomed.start()
+    deadline = time.monotonic() + 10
+    while job_row(queue, job_ids[0])[1] != "doomed":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    workers = [
+        multiprocessing.Process(target=_run_worker_process, args=(queue.db_path, f"w{i}", False, done_ids))
+        for i in range(3)
+    ]
+    for process in workers:
+        process.start()
+    doomed.kill()
+    doomed.join()
+    for process in workers:
+        process.join(30)
+        assert process.exitcode == 0
+
+    completed = sorted(done_ids.get(timeout=5) for _ in job_ids)
+    assert completed == job_ids
+    assert done_ids.empty()
+    assert queue.stats()[STATUS_DONE] == len(job_ids)
+    # The killed worker's job was re-queued once its lease expired
+    assert job_row(queue, job_ids[0])[2] == 2
+
+def test_failing_job_retried_until_max_attempts(queue):
+    queue.enqueue("https://example.com/a", 720, max_attempts=2)
+    calls = []
+
+    def run_download(job, cancel_event):
+        calls.append(job.attempts)
+        raise RuntimeError("download broke")
+
+    assert make_worker(queue, run_download).run(exit_when_empty=True) == 0
+    assert calls == [1, 2]
+    assert queue.stats()[STATUS_FAILED] == 1
+
+def test_stop_cancels_running_job_and_releases_it(queue):
+    job_id = queue.enqueue("https://example.com/a", 720)
+    started = threading.Event()
+
+    def run_download(job, cancel_event):
+        started.set()
+        if cancel_event.wait(5):
+            raise DownloadCanceledException("canceled")
+
+    worker = make_worker(queue, run_download)
+    worker.heartbeat_interval = 30  # stop() must not depend on the heartbeat waking up
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    assert started.wait(5)
+
+    stopped_at = time.monotonic()
+    worker.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert time.monotonic() - stopped_at < 1
+    assert job_row(queue, job_id) == (STATUS_QUEUED, None, 0)
+
+def test_lost_lease_cancels_download(queue):
+    job_id = queue.enqueue("https://example.com/a", 720)
+    canceled = []
+
+    def run_download(job, cancel_event):
+        if job.attempts > 1:
+            return
+        # Another worker takes the job over behind our back
+        with sqlite3.connect(queue.db_path) as conn:
+            conn.execute("UPDATE jobs SET worker_id = 'w2' WHERE id = ?", (job.id,))
+        canceled.append(cancel_event.wait(5))
+        raise DownloadCanceledException("canceled")
+
+    # w2 never finishes, so its lease expires and the job comes back to w1
+    assert make_worker(queue, run_download).run(exit_when_empty=True) == 1
+    assert canceled == [True]
+    assert job_row(queue, job_id) == (STATUS_DONE, "w1", 2)
+
+def test_queue_errors_do_not_stop_worker(queue, monkeypatch):
+    queue.enqueue("https://example.com/a", 720)
+    real_claim, real_complete = queue.claim, queue.complete
+    failures = {"claim": 1, "complete": 1}
+
+    def flaky(name, method):
+        def call(*args):
+            if failures[name]:
+                failures[name] -= 1
+                raise sqlite3.OperationalError("database is locked")
+            return method(*args)
+        return call
+
+    monkeypatch.setattr(queue, "claim", flaky("claim", real_claim))
+    monkeypatch.setattr(queue, "complete", flaky("complete", real_complete))
+    worker = make_worker(queue, lambda job, cancel_event: None)
+
+    # The first completion is lost; the job comes back once its lease expires
+    assert worker.run(max_jobs=1) == 1
+    assert queue.stats()[STATUS_DONE] == 1
+
+def test_run_download_passes_paths_and_job_id_filename(queue, monkeypatch):
+    downloads = []
+
+    class FakeDownloadManager:
+        def __init__(self, progress_hook, cancel_event, cookie_file, ffmpeg_path):
+            self.paths = (cookie_file, ffmpeg_path)
+
+        def fetch_video_info(self, url):
+            return {"title": "Same: title", "webpage_url": url}
+
+        def start_download(self, info, resolution, filename):
+            downloads.append((filename, self.paths))
+
+    # run_download imports DownloadManager lazily, so no yt_dlp is needed
+    monkeypatch.setitem(sys.modules, "downloader", types.SimpleNamespace(DownloadManager=FakeDownloadManager))
+    queue.enqueue("https://example.com/a", 720)
+    queue.enqueue("https://example.com/a", 720)
+    worker = Worker(queue, poll_interval=0.01, cookie_file="/tmp/cookies.txt", ffmpeg_path="/usr/bin/ffmpeg")
+
+    assert worker.run(exit_when_empty=True) == 2
+    paths = ("/tmp/cookies.txt", "/usr/bin/ffmpeg")
+    assert downloads == [("Same_ title_720p_1", paths), ("Same_ title_720p_2", paths)]
+
+def test_default_ffmpeg_path_falls_back_to_path(tmp_path, monkeypatch):
+    bundled = tmp_path / "ffmpeg.exe"
+    monkeypatch.setattr(worker_module, "FFMPEG_PATH", str(bundled))
+    monkeypatch.setattr(worker_module.shutil, "which", lambda name: f"/usr/bin/{name}")
+    assert worker_module.default_ffmpeg_path() == "/usr/bin/ffmpeg"
+
+    bundled.touch()
+    assert worker_module.default_ffmpeg_path() == str(bundled)
@@ -0,0 +1,79 @@
+# test_worker_cli.py
+import sys
+
+import pytest
+
+import worker as worker_module
+from job_queue import JobQueue, STATUS_DONE
+
+@pytest.fixture
+def paths(tmp_path):
+    cookies = tmp_path / "cookies.txt"
+    ffmpeg = tmp_path / "ffmpeg"
+    cookies.touch()
+    ffmpeg.touch()
+    return {"queue": str(tmp_path / "jobs.db"), "cookies": str(cookies), "ffmpeg": str(ffmpeg)}
+
+def work_args(paths, *extra):
+    return ["--queue", paths["queue"], "work", "--cookies", paths["cookies"], "--ffmpeg", paths["ffmpeg"], *extra]
+
+def _download_instantly(self, job, cancel_event):
+    pass
+
+def _worker_refuses(*args):
+    sys.exit(1)
+
+def _worker_succeeds(*args):
+    pass
+
+def test_work_exits_with_error_when_dependencies_missing(paths, capsys):
+    paths["ffmpeg"] += ".missing"
+    with pytest.raises(SystemExit) as exc:
+        worker_module.main(work_args(paths, "--processes", "3"))
+    assert exc.value.code == 1
+    # Checked once in the parent, not once per worker process
+    assert capsys.readouterr().err.count("FFmpeg not found") == 1
+
+def test_work_exits_with_error_when_a_worker_process_fails(paths, monkeypatch, capsys):
+    monkeypatch.setattr(worker_module, "run_worker", _worker_refuses)
+    with pytest.raises(SystemExit) as exc:
+        worker_module.main(work_args(paths, "--processes", "3"))
+    assert exc.value.code == 1
+    assert "3 of 3 worker process(es)" in capsys.readouterr().err
+
+def test_work_succeeds_when_all_worker_processes_succeed(paths, monkeypatch):
+    monkeypatch.setattr(worker_module, "run_worker", _worker_succeeds)
+    worker_module.main(work_args(paths, "--processes", "3"))
+
+@pytest.mark.parametrize("args", [
+    ["--lease", "0", "status"],
+    ["--lease", "-1", "status"],
+    ["enqueue", "https://example.com/a", "--max-attempts", "0"],
+    ["work", "--processes", "0"],
+    ["work", "--max-jobs", "-2"],
+])
+def test_rejects_non_positive_values(paths, args, capsys):
+    with pytest.raises(SystemExit) as exc:
+        worker_module.main(["--queue", paths["queue"], *args])
+    assert exc.value.code == 2
+    assert "must be greater than 0" in capsys.readouterr().err
+
+def test_enqueue_and_status(paths, capsys):
+    worker_module.main(["--queue", paths["queue"], "enqueue", "https://example.com/a", "https://example.com/b"])
+    assert "Queued job 2: https://example.com/b" in capsys.readouterr().out
+
+    worker_module.main(["--queue", paths["queue"], "status"])
+    assert "queued: 2" in capsys.readouterr().out.splitlines()
+
+@pytest.mark.parametrize("processes", ["1", "3"])
+def test_work_drains_queue(paths, processes, monkeypatch):
+    monkeypatch.setattr(worker_module, "ensure_directories", lambda: None)
+    monkeypatch.setattr(worker_module.Worker, "run_download", _download_instantly)
+    # run_worker installs signal handlers, keep them out of the test process
+    monkeypatch.setattr(worker_module.signal, "signal", lambda signum, handler: None)
+    queue = JobQueue(paths["queue"])
+    for i in range(6):
+        queue.enqueue(f"https://example.com/{i}", 720)
+
+    worker_module.main(work_args(paths, "--processes", processes, "--exit-when-empty"))
+    assert queue.stats()[STATUS_DONE] == 6
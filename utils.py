@@ -1,5 +1,6 @@
 # utils.py
 import os
+import re
 from typing import List, Union
 from config_manager import COOKIE_FILE_PATH, FFMPEG_PATH, VIDEO_DIR # Import paths from config_manager
 
@@ -7,13 +8,18 @@ from config_manager import COOKIE_FILE_PATH, FFMPEG_PATH, VIDEO_DIR # Import pat
 LOGO_PATH = os.path.join(os.path.dirname(__file__), "Res", "logo.png")
 ICON_PATH = os.path.join(os.path.dirname(__file__), "Res", "icon.ico")
 
+def check_download_dependencies(cookie_file: str = COOKIE_FILE_PATH, ffmpeg_path: str = FFMPEG_PATH) -> List[str]:
+    """Check for the files needed to download (also used by headless workers)"""
+    errors = []
+    if not os.path.exists(cookie_file):
+        errors.append(f"Cookie file not found: {cookie_file}\nPlease export YouTube cookies.")
+    if not os.path.exists(ffmpeg_path):
+        errors.append(f"FFmpeg not found: {ffmpeg_path}\nPlease place ffmpeg.exe next to the program.")
+    return errors
+
 def check_dependencies() -> List[str]:
     """Check for required files"""
-    errors = []
-    if not os.path.exists(COOKIE_FILE_PATH):
-        errors.append(f"Cookie file not found: {COOKIE_FILE_PATH}\nPlease export YouTube cookies.")
-    if not os.path.exists(FFMPEG_PATH):
-        errors.append(f"FFmpeg not found: {FFMPEG_PATH}\nPlease place ffmpeg.exe next to the program.")
+    errors = check_download_dependencies()
     if not os.path.exists(LOGO_PATH):
         errors.append(f"Logo not found: {LOGO_PATH}\nPlease place logo.png in Res folder.")
     if not os.path.exists(ICON_PATH):
@@ -30,6 +36,10 @@ def format_bytes(bytes_value: Union[int, float]) -> str:
         bytes_value /= 1024.0
     return f"{bytes_value:.2f} TB"
 
+def sanitize_filename(name: str) -> str:
+    """Replace characters that are not allowed in Windows file names"""
+    return re.sub(r'[<>:"/\\|?*\x00-\x1F]', '_', name)
+
 # Define a custom exception for cancellation
 class DownloadCanceledException(Exception):
     pass
\ No newline at end of file
@@ -0,0 +1,256 @@
+# worker.py
+import argparse
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+from config_manager import ensure_directories, COOKIE_FILE_PATH, FFMPEG_PATH
+from utils import DownloadCanceledException, check_download_dependencies, sanitize_filename
+from job_queue import JobQueue, Job, DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS
+
+class Worker:
+    """Headless worker that pulls download jobs from a shared JobQueue.
+
+    Several workers (on one or many hosts) can point at the same queue file;
+    each one runs a single DownloadManager at a time, so throughput grows with
+    the number of workers.
+    """
+
+    def __init__(self, queue: JobQueue, worker_id: Optional[str] = None,
+                 heartbeat_interval: Optional[float] = None, poll_interval: float = 2.0,
+                 cookie_file: str = COOKIE_FILE_PATH, ffmpeg_path: str = FFMPEG_PATH):
+        self.queue = queue
+        self.cookie_file = cookie_file
+        self.ffmpeg_path = ffmpeg_path
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        # Renew the lease well before it runs out so one slow heartbeat does not lose the job
+        self.heartbeat_interval = heartbeat_interval or queue.lease_seconds / 3
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        # Cancel event of the job being downloaded, so stop() can abort it right away
+        self._current_cancel: Optional[threading.Event] = None
+
+    def stop(self):
+        """Ask the worker to stop; a running job is canceled and put back in the queue"""
+        self._stop.set()
+        cancel_event = self._current_cancel
+        if cancel_event is not None:
+            cancel_event.set()
+
+    def run(self, max_jobs: Optional[int] = None, exit_when_empty: bool = False) -> int:
+        """Process jobs until stopped. Returns the number of jobs completed."""
+        ensure_directories()
+        completed = 0
+        while not self._stop.is_set() and (max_jobs is None or completed < max_jobs):
+            try:
+                job = self.queue.claim(self.worker_id)
+                # Jobs leased to other workers are not finished yet: if one of them dies,
+                # its job comes back once the lease expires and must still be picked up
+                if job is None and exit_when_empty and self.queue.pending() == 0:
+                    break
+            except sqlite3.Error as e:
+                # e.g. "database is locked" or the shared storage being briefly unreachable
+                print(f"[{self.worker_id}] Could not claim a job: {e}", flush=True)
+                self._stop.wait(self.poll_interval)
+                continue
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            if self.process_job(job):
+                completed += 1
+        return completed
+
+    def process_job(self, job: Job) -> bool:
+        """Run one leased job while heartbeating its lease. Returns True if it completed."""
+        cancel_event = threading.Event()
+        lease_lost = threading.Event()
+        job_finished = threading.Event()
+
+        def heartbeat_loop():
+            # Keep renewing until the download has fully unwound, even after a stop request
+            while not job_finished.wait(self.heartbeat_interval):
+                try:
+                    alive = self.queue.heartbeat(job.id, self.worker_id)
+                except Exception as e:
+                    # The queue file may be briefly unreachable; the lease still has time left
+                    print(f"[{self.worker_id}] Heartbeat failed for job {job.id}: {e}", flush=True)
+                    continue
+                if not alive:
+                    # Another worker took the job over, stop downloading a duplicate
+                    lease_lost.set()
+                    cancel_event.set()
+                    return
+
+        self._current_cancel = cancel_event
+        if self._stop.is_set():
+            # stop() ran between claim() and here
+            cancel_event.set()
+        heartbeat_thread = threading.Thread(target=heartbeat_loop, daemon=True)
+        heartbeat_thread.start()
+        print(f"[{self.worker_id}] Job {job.id} (attempt {job.attempts}): {job.url}", flush=True)
+        error: Optional[Exception] = None
+        try:
+            self.run_download(job, cancel_event)
+        except Exception as e:
+            error = e
+        finally:
+            self._current_cancel = None
+            job_finished.set()
+            heartbeat_thread.join()
+
+        try:
+            if error is None:
+                if not self.queue.complete(job.id, self.worker_id):
+                    print(f"[{self.worker_id}] Job {job.id} finished after its lease was lost.", flush=True)
+                    return False
+                print(f"[{self.worker_id}] Job {job.id} completed.", flush=True)
+                return True
+            # yt_dlp may wrap our DownloadCanceledException, so check the events instead of the type
+            if lease_lost.is_set():
+                print(f"[{self.worker_id}] Lost lease on job {job.id}, dropped it.", flush=True)
+                return False
+            if cancel_event.is_set():
+                if not self.queue.release(job.id, self.worker_id):
+                    print(f"[{self.worker_id}] Job {job.id} canceled after its lease was lost.", flush=True)
+                    return False
+                print(f"[{self.worker_id}] Job {job.id} canceled, returned to queue.", flush=True)
+                return False
+            print(f"[{self.worker_id}] Job {job.id} failed: {error}", flush=True)
+            self.queue.fail(job.id, self.worker_id, str(error))
+            return False
+        except sqlite3.Error as e:
+            # The lease runs out on its own, so the job is not lost; just back off
+            print(f"[{self.worker_id}] Could not update job {job.id} in the queue: {e}", flush=True)
+            self._stop.wait(self.poll_interval)
+            return False
+
+    def run_download(self, job: Job, cancel_event: threading.Event):
+        """Fetch info and download one job with a DownloadManager"""
+        # Imported here so enqueue/status (and the tests) work on hosts without yt_dlp
+        from downloader import DownloadManager
+
+        def progress_hook(d: Dict[str, Any]):
+            # Raise inside yt_dlp's hook to abort the download, same as the GUI does
+            if cancel_event.is_set():
+                raise DownloadCanceledException("Download canceled by worker.")
+
+        download_manager = DownloadManager(progress_hook=progress_hook, cancel_event=cancel_event,
+                                           cookie_file=self.cookie_file, ffmpeg_path=self.ffmpeg_path)
+        info = download_manager.fetch_video_info(job.url)
+        if cancel_event.is_set():
+            raise DownloadCanceledException("Download canceled by worker.")
+        # The job id keeps two jobs with the same title (or URL) from writing to the same file
+        filename = f"{sanitize_filename(info['title'])}_{job.resolution}p_{job.id}"
+        download_manager.start_download(info, job.resolution, filename)
+
+def default_ffmpeg_path() -> str:
+    """Use the bundled ffmpeg.exe if present, otherwise the ffmpeg on PATH (e.g. on Linux hosts)"""
+    if os.path.exists(FFMPEG_PATH):
+        return FFMPEG_PATH
+    return shutil.which("ffmpeg") or FFMPEG_PATH
+
+def run_worker(db_path: str, lease_seconds: float, exit_when_empty: bool, max_jobs: Optional[int],
+               cookie_file: str = COOKIE_FILE_PATH, ffmpeg_path: str = FFMPEG_PATH):
+    """Entry point for one worker process"""
+    # A host without cookies or ffmpeg would fail every job it claims and use up their attempts
+    errors = check_download_dependencies(cookie_file, ffmpeg_path)
+    if errors:
+        for error in errors:
+            print(f"Worker not started: {error}", file=sys.stderr, flush=True)
+        sys.exit(1)
+    worker = Worker(JobQueue(db_path, lease_seconds=lease_seconds),
+                    cookie_file=cookie_file, ffmpeg_path=ffmpeg_path)
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+    completed = worker.run(max_jobs=max_jobs, exit_when_empty=exit_when_empty)
+    print(f"[{worker.worker_id}] Stopped after {completed} completed job(s).", flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AkenoDownloader headless worker mode")
+    parser.add_argument("--queue", required=True, help="Path to the shared SQLite job queue file")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                        help="Lease length in seconds (default: %(default)s)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Add download jobs to the queue")
+    enqueue_parser.add_argument("urls", nargs="+")
+    enqueue_parser.add_argument("--resolution", type=int, default=1080)
+    enqueue_parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+
+    work_parser = subparsers.add_parser("work", help="Run workers that process queued jobs")
+    work_parser.add_argument("--processes", type=int, default=1,
+                             help="Number of worker processes to start on this host")
+    work_parser.add_argument("--exit-when-empty", action="store_true",
+                             help="Stop once the queue has no jobs left instead of polling")
+    work_parser.add_argument("--max-jobs", type=int, default=None,
+                             help="Stop each worker after this many completed jobs")
+    work_parser.add_argument("--cookies", default=COOKIE_FILE_PATH,
+                             help="Netscape cookie file (default: cookies.txt in the working directory)")
+    work_parser.add_argument("--ffmpeg", default=None,
+                             help="Path to ffmpeg (default: ffmpeg.exe next to the program, else ffmpeg on PATH)")
+
+    subparsers.add_parser("status", help="Show job counts per status")
+
+    args = parser.parse_args(argv)
+    # A lease of 0 expires as soon as it is taken, letting several workers claim the same job
+    if args.lease <= 0:
+        parser.error("--lease must be greater than 0")
+    for option in ("max_attempts", "processes", "max_jobs"):
+        value = getattr(args, option, None)
+        if value is not None and value <= 0:
+            parser.error(f"--{option.replace('_', '-')} must be greater than 0")
+
+    if args.command == "enqueue":
+        queue = JobQueue(args.queue, lease_seconds=args.lease)
+        for url in args.urls:
+            job_id = queue.enqueue(url, args.resolution, max_attempts=args.max_attempts)
+            print(f"Queued job {job_id}: {url}")
+    elif args.command == "status":
+        queue = JobQueue(args.queue, lease_seconds=args.lease)
+        for status, count in queue.stats().items():
+            print(f"{status}: {count}")
+    elif args.command == "work":
+        ffmpeg_path = args.ffmpeg or default_ffmpeg_path()
+        worker_args = (args.queue, args.lease, args.exit_when_empty, args.max_jobs, args.cookies, ffmpeg_path)
+        # Check once here so N workers do not each print the same error
+        errors = check_download_dependencies(args.cookies, ffmpeg_path)
+        if errors:
+            for error in errors:
+                print(f"Worker not started: {error}", file=sys.stderr, flush=True)
+            sys.exit(1)
+        if args.processes <= 1:
+            run_worker(*worker_args)
+            return
+        # Create the schema once before the workers race to open the file
+        JobQueue(args.queue, lease_seconds=args.lease)
+        processes = [
+            multiprocessing.Process(target=run_worker, args=worker_args)
+            for _ in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        # Ctrl+C reaches the workers directly; forward SIGTERM so they stop too
+        previous_sigint = signal.signal(signal.SIGINT, signal.SIG_IGN)
+        previous_sigterm = signal.signal(
+            signal.SIGTERM, lambda signum, frame: [p.terminate() for p in processes if p.is_alive()])
+        try:
+            for process in processes:
+                process.join()
+        finally:
+            signal.signal(signal.SIGINT, previous_sigint)
+            signal.signal(signal.SIGTERM, previous_sigterm)
+        # Let batch scripts see a broken host instead of a silent success
+        failed = [process for process in processes if process.exitcode != 0]
+        if failed:
+            print(f"{len(failed)} of {len(processes)} worker process(es) exited with an error.",
+                  file=sys.stderr, flush=True)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()